@@ -1,17 +1,18 @@
 import logging
-from typing import List, Text, Optional
+from typing import TYPE_CHECKING, List, Text, Optional
 
-from compare_nlu_results.results import NamedResultFile, EvaluationResultSet
-from compare_nlu_results.tables import ResultSetDiffTable
 from compare_nlu_results import cli
 
+if TYPE_CHECKING:
+    from compare_nlu_results.results import NamedResultFile
+
 
 logger = logging.getLogger(__file__)
 
 
 def create_comparison(
-    base_result_file: NamedResultFile,
-    other_result_files: List[NamedResultFile],
+    base_result_file: "NamedResultFile",
+    other_result_files: List["NamedResultFile"],
     metric_to_sort_by: Text,
     json_outfile: Optional[Text] = None,
     html_outfile: Optional[Text] = None,
@@ -23,6 +24,10 @@ def create_comparison(
     append_table: Optional[bool] = None,
     style_table: Optional[bool] = None,
 ):
+    # deferred so that parser-only invocations (--help, argument errors)
+    # never pay the pandas import cost
+    from compare_nlu_results.results import EvaluationResultSet
+    from compare_nlu_results.tables import ResultSetDiffTable
 
     combined_results = EvaluationResultSet.from_result_files(
         nlu_result_files=[base_result_file] + other_result_files, label_name=label_name
@@ -1,13 +1,15 @@
 import argparse
 import logging
 
-from compare_nlu_results.results import NamedResultFile
-
 logger = logging.getLogger(__file__)
 
 
 class parse_nlu_result_files(argparse.Action):
     def __call__(self, parser, args, values, option_string=None):
+        # imported here so building the parser (e.g. for --help) does
+        # not pull in pandas via the results module
+        from compare_nlu_results.results import NamedResultFile
+
         result_file_pairs = parse_cli_arg_pairs(values)
         nlu_result_files = [
             NamedResultFile(filepath=filepath, name=name)
@@ -25,10 +27,8 @@ def parse_cli_arg_pair(input_string):
     or
         foo="hello world"
     """
-    items = input_string.split("=")
-    try:
-        assert len(items) == 2
-    except AssertionError:
+    key, separator, value = input_string.partition("=")
+    if not separator:
         logger.error(
             f"ERROR: argument '{input_string}' is not parseable. "
             f"When passing key-value command line arguments, "
@@ -37,9 +37,7 @@ def parse_cli_arg_pair(input_string):
             f'e.g. --cli_flag key=value key2="value 2"'
         )
         exit()
-    key = items[0].strip()
-    value = items[1].strip()
-    return (key, value)
+    return (key.strip(), value.strip())
 
 
 def parse_cli_arg_pairs(items):
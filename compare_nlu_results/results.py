@@ -1,13 +1,46 @@
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, NamedTuple, Optional, Text
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache, reduce
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Text, Tuple
 
+import numpy as np
 import pandas as pd
 
-from compare_nlu_results.dataframes import ResultDf, ResultSetDf, ResultSetDiffDf
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from compare_nlu_results import dataframes
 
 logger = logging.getLogger(__file__)
 
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "compare_nlu_results")
+
+# Reports below this size are read outright; mmap setup only pays off
+# for larger files.
+MMAP_MIN_FILE_SIZE = 256 * 1024
+
+# Streaming parsing keeps peak memory flat but is slower per byte than a
+# one-shot parse; only reports above this size are streamed.
+STREAMING_MIN_FILE_SIZE = 50 * 1024 * 1024
+
+# Shared frame for result sets with nothing in them; built once since
+# even an empty DataFrame pays block-manager and index setup.
+_EMPTY_RESULT_SET_DF = pd.DataFrame(
+    index=pd.Index([]),
+    columns=pd.MultiIndex(levels=[[], []], codes=[[], []]),
+)
+
 
 class NamedResultFile(NamedTuple):
     """Holds a filepath and the name associated with it."""
@@ -16,6 +49,30 @@ class NamedResultFile(NamedTuple):
     name: Text
 
 
+@lru_cache(maxsize=64)
+def _parse_json_report(filepath: Text, mtime_ns: int, size: int) -> Dict:
+    """
+    Parse a json report file, memoized on the file's identity
+    (path, mtime, size) so re-reading an unchanged file within the
+    same process skips the parse.
+    """
+    with open(filepath, "rb") as f:
+        if ijson is not None and size > STREAMING_MIN_FILE_SIZE:
+            report = {
+                label: metrics
+                for label, metrics in ijson.kvitems(f, "", use_float=True)
+            }
+        elif orjson is not None:
+            if size > MMAP_MIN_FILE_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    report = orjson.loads(memoryview(mm))
+            else:
+                report = orjson.loads(f.read())
+        else:
+            report = json.load(f)
+    return report
+
+
 class EvaluationResult:
     """
     Represents a single set of Rasa NLU evaluation results
@@ -30,37 +87,107 @@ class EvaluationResult:
         name: Text = "Evaluation Result",
         label_name: Text = "label",
     ):
-        self.report = self.load_json_report_from_file(json_report_filepath)
         self.name = name
         self.label_name = label_name
-        self.df = self.convert_report_to_df()
+        cached_result = self.load_result_from_cache(json_report_filepath)
+        if cached_result is not None:
+            self.report, self.df = cached_result
+            dataframes.clean(self.df, label_name=self.label_name)
+        else:
+            self.report = self.load_json_report_from_file(json_report_filepath)
+            self.df = self.convert_report_to_df()
+            self.write_result_to_cache(json_report_filepath)
 
-    @classmethod
-    def load_json_report_from_file(cls, filepath: Text) -> Dict:
+    @staticmethod
+    def load_json_report_from_file(filepath: Text) -> Dict:
         """
         Load report from a <report-type>_report.json file.
+
+        Large reports are parsed incrementally with ijson (when
+        available), so the raw file text and the full parsed tree never
+        coexist in memory; typical-sized reports take the faster
+        one-shot orjson/stdlib parse. Parses of an unchanged file are
+        memoized within the process.
         """
-        if filepath:
-            with open(filepath, "r") as f:
-                report = json.loads(f.read())
-        else:
-            report = {}
-        return report
+        if not filepath:
+            return {}
+        file_stats = os.stat(filepath)
+        return _parse_json_report(filepath, file_stats.st_mtime_ns, file_stats.st_size)
+
+    @staticmethod
+    def _cache_path_for_file(filepath: Text) -> Text:
+        """Cache entry path keyed on the report's identity.
+
+        The key hashes (path, mtime_ns, size) — the same identity the
+        in-process parse memo uses — so any metadata change simply
+        misses the cache instead of being compared against the cache
+        entry's own timestamp (which serves stale results when report
+        files arrive with archived mtimes, as CI artifacts often do).
+        """
+        file_stats = os.stat(filepath)
+        report_key = hashlib.sha1(
+            f"{os.path.abspath(filepath)}"
+            f":{file_stats.st_mtime_ns}:{file_stats.st_size}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(CACHE_DIR, f"{report_key}.pkl")
+
+    def load_result_from_cache(
+        self, filepath: Optional[Text]
+    ) -> Optional[Tuple[Dict, pd.DataFrame]]:
+        """
+        Return the cached (report, df) pair for `filepath` if a cache
+        entry exists for the file as it is on disk right now.
+
+        Skips the JSON parse and DataFrame build entirely on repeated
+        runs against unchanged report files. Any cache problem (missing
+        entry, stale pickle format, ...) falls back to a cold load.
+        """
+        if not filepath:
+            return None
+        try:
+            return pd.read_pickle(self._cache_path_for_file(filepath))
+        except Exception:
+            return None
+
+    def write_result_to_cache(self, filepath: Optional[Text]):
+        """Cache the parsed report and cleaned dataframe for `filepath`."""
+        if not filepath:
+            return
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            pd.to_pickle((self.report, self.df), self._cache_path_for_file(filepath))
+        except Exception:
+            pass
 
     def write_json_report_to_file(self, filepath: Text):
         """Write report to json file."""
-        with open(filepath, "w+") as fh:
-            json.dump(self.report, fh, indent=2)
+        if orjson is not None:
+            with open(filepath, "wb", buffering=1 << 20) as fh:
+                fh.write(orjson.dumps(self.report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filepath, "w+", buffering=1 << 20) as fh:
+                json.dump(self.report, fh, indent=2)
 
     def convert_df_to_report(self) -> Dict:
         """Convert dataframe to dict representation"""
-        report = self.df.T.to_dict()
+        columns = self.df.columns.tolist()
+        report = {}
+        for row in self.df.itertuples(index=True, name=None):
+            report[row[0]] = {
+                column: value.item() if isinstance(value, np.generic) else value
+                for column, value in zip(columns, row[1:])
+            }
         return report
 
-    def convert_report_to_df(self) -> ResultDf:
+    def convert_report_to_df(self) -> pd.DataFrame:
         """Convert dict representation to dataframe"""
-        df = ResultDf(pd.DataFrame.from_dict(self.report).transpose())
-        df.clean(label_name=self.label_name)
+        rows = {
+            label: metrics
+            for label, metrics in self.report.items()
+            if isinstance(metrics, dict)
+        }
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        dataframes.clean(df, label_name=self.label_name)
         return df
 
 
@@ -82,27 +209,37 @@ class EvaluationResultSet(EvaluationResult):
         self.result_sets = result_sets
         self.validate_unique_result_set_names()
         self.label_name = label_name
-        self.df = self.convert_result_sets_to_df()
-        self.report = self.convert_df_to_report()
+        self._diff_df_cache: Dict[Any, pd.DataFrame] = {}
 
     @classmethod
     def from_result_files(
         cls,
         nlu_result_files: List[NamedResultFile],
         label_name: Optional[Text] = "label",
+        max_workers: Optional[int] = None,
     ) -> "EvaluationResultSet":
         """
         Combine multiple NLU evaluation result files into a
         EvaluationResultSet instance
+
+        The result files are loaded in a thread pool since each one is
+        an independent read+parse; file order is preserved. By default
+        one worker per file is used, capped at 8; pass `max_workers` to
+        override.
         """
-        result_sets = [
-            EvaluationResult(
-                json_report_filepath=result_file.filepath,
-                name=result_file.name,
-                label_name=label_name,
+        if max_workers is None:
+            max_workers = min(8, max(1, len(nlu_result_files)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            result_sets = list(
+                executor.map(
+                    lambda result_file: EvaluationResult(
+                        json_report_filepath=result_file.filepath,
+                        name=result_file.name,
+                        label_name=label_name,
+                    ),
+                    nlu_result_files,
+                )
             )
-            for result_file in nlu_result_files
-        ]
         combined_results = cls(result_sets=result_sets, label_name=label_name)
         return combined_results
 
@@ -117,55 +254,121 @@ class EvaluationResultSet(EvaluationResult):
             )
             raise
 
-    def convert_result_sets_to_df(self) -> ResultSetDf:
+    def convert_result_sets_to_df(self) -> pd.DataFrame:
         """Combine multiple sets of evaluation results into a single dataframe"""
         if not self.result_sets:
-            columns = pd.MultiIndex(levels=[[], []], codes=[[], []])
-            index = pd.Index([])
-            joined_df = pd.DataFrame(index=index, columns=columns)
+            joined_df = _EMPTY_RESULT_SET_DF
         else:
-            joined_df = pd.concat(
-                [pd.DataFrame(result_set.df) for result_set in self.result_sets],
-                axis=1,
-                keys=[result.name for result in self.result_sets],
+            union_index = reduce(
+                lambda left, right: left.union(right, sort=False),
+                (result_set.df.index for result_set in self.result_sets),
+            ).rename(self.label_name)
+            data = {
+                (metric, result_set.name): result_set.df[metric]
+                for result_set in self.result_sets
+                for metric in result_set.df.columns
+            }
+            joined_df = pd.DataFrame(data, index=union_index)
+            joined_df.columns = pd.MultiIndex.from_tuples(
+                joined_df.columns, names=dataframes.RESULT_SET_COLUMNS_NAMES
             )
-            joined_df.columns = joined_df.columns.swaplevel()
-            joined_df = ResultSetDf(joined_df)
-            joined_df.clean(label_name=self.label_name)
+            dataframes.clean(joined_df, label_name=self.label_name)
         return joined_df
 
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        """Combined dataframe of all result sets, built on first use."""
+        return self.convert_result_sets_to_df()
+
+    @cached_property
+    def report(self) -> Dict[Text, Any]:
+        """Dict representation of the combined results, built on first use."""
+        return self.convert_df_to_report()
+
+    def _iter_label_reports(self) -> Iterator[Tuple[Text, Dict[Text, Any]]]:
+        """
+        Yield (label, label_report) pairs one label at a time, built
+        straight from the dataframe's rows.
+        """
+        metric_positions: Dict[Text, List[Tuple[int, Text]]] = {}
+        for position, (metric, result_set_name) in enumerate(self.df.columns):
+            metric_positions.setdefault(metric, []).append((position, result_set_name))
+        values = self.df.to_numpy()
+        for row, label in zip(values, self.df.index):
+            label_report: Dict[Text, Any] = {}
+            if label:
+                for metric, positions in metric_positions.items():
+                    metric_report: Dict[Text, Any] = {}
+                    for position, result_set_name in positions:
+                        value = row[position]
+                        if isinstance(value, np.generic):
+                            value = value.item()
+                        metric_report[result_set_name] = value
+                    label_report[metric] = metric_report
+            yield label, label_report
+
     def convert_df_to_report(self) -> Dict[Text, Any]:
         """Convert dataframe to dict representation"""
-        report = {
-            label: {
-                metric: self.df.loc[label].xs(metric).to_dict()
-                for metric in self.df.loc[label].index.get_level_values("metric")
-                if label
-            }
-            for label in self.df.index
-        }
-        return report
+        return dict(self._iter_label_reports())
+
+    def write_json_report_to_file(self, filepath: Text):
+        """Write report to json file.
+
+        Serializes one label at a time so the full nested report never
+        has to be rendered as a single in-memory blob; the output is
+        byte-identical to dumping the whole report at once.
+        """
+        if orjson is None:
+            super().write_json_report_to_file(filepath)
+            return
+        with open(filepath, "wb", buffering=1 << 20) as fh:
+            wrote_any = False
+            for label, label_report in self._iter_label_reports():
+                fragment = orjson.dumps(
+                    {label: label_report}, option=orjson.OPT_INDENT_2
+                )
+                # strip the fragment's outer braces; the indentation of
+                # what remains already matches the enclosing object
+                fh.write(b",\n" if wrote_any else b"{\n")
+                fh.write(fragment[2:-2])
+                wrote_any = True
+            fh.write(b"\n}" if wrote_any else b"{}")
+
+    def convert_report_to_df(self) -> pd.DataFrame:
+        """Load dataframe from dict report.
 
-    def convert_report_to_df(self) -> ResultSetDf:
-        """Load dataframe from dict report."""
-        joined_df = pd.DataFrame.from_dict(
-            {
-                (label, metric): self.report[label][metric]
-                for label in self.report.keys()
-                for metric in self.report[label].keys()
-            },
-            orient="index",
-        ).unstack()
-        joined_df = ResultSetDf(joined_df)
-        joined_df.clean(label_name=self.label_name)
+        Walks the nested report once and assembles the columns and
+        their (metric, result_set) MultiIndex directly, instead of
+        pivoting a (label, metric)-indexed frame with unstack (which
+        also left the metric and result_set levels swapped relative to
+        convert_result_sets_to_df).
+        """
+        if not self.report:
+            return _EMPTY_RESULT_SET_DF
+        column_values: Dict[Any, Dict[Text, Any]] = {}
+        for label, label_report in self.report.items():
+            for metric, result_set_values in label_report.items():
+                for result_set_name, value in result_set_values.items():
+                    column_values.setdefault((metric, result_set_name), {})[
+                        label
+                    ] = value
+        joined_df = pd.DataFrame(
+            column_values,
+            index=pd.Index(self.report.keys(), name=self.label_name),
+        )
+        joined_df.columns = pd.MultiIndex.from_tuples(
+            joined_df.columns, names=dataframes.RESULT_SET_COLUMNS_NAMES
+        )
+        dataframes.clean(joined_df, label_name=self.label_name)
         return joined_df
 
     def convert_df_to_result_sets(self) -> List[EvaluationResult]:
         """Split dataframe out into the component result sets."""
         result_sets = []
-        for result_set_name in self.df.columns.get_level_values("result_set"):
+        swapped = self.df.swaplevel(axis=1)
+        for result_set_name in self.df.columns.unique(level="result_set"):
             result = EvaluationResult(name=result_set_name, label_name=self.label_name)
-            result.df = self.df.swaplevel(axis=1)[result_set_name]
+            result.df = swapped[result_set_name]
             result.report = result.convert_df_to_report()
             result_sets.append(result)
         return result_sets
@@ -175,9 +378,21 @@ class EvaluationResultSet(EvaluationResult):
         metrics_to_diff: Optional[List[Text]] = None,
         base_result_set_name: Optional[Text] = None,
     ):
+        """
+        Get the diff dataframe for the given metrics and base result
+        set. Repeated calls with the same arguments return the cached
+        diff instead of recomputing it.
+        """
         if not base_result_set_name:
             base_result_set_name = self.result_sets[0].name
-        diff_df = ResultSetDiffDf.from_df(
-            self.df, base_result_set_name, metrics_to_diff
+        cache_key = (
+            base_result_set_name,
+            tuple(metrics_to_diff) if metrics_to_diff else None,
         )
+        diff_df = self._diff_df_cache.get(cache_key)
+        if diff_df is None:
+            diff_df = dataframes.diff_from_df(
+                self.df, base_result_set_name, metrics_to_diff
+            )
+            self._diff_df_cache[cache_key] = diff_df
         return diff_df
@@ -1,88 +1,101 @@
+import io
 import logging
-from typing import List, Optional, Text
+from typing import Dict, List, Optional, Text
 
+import numpy as np
 import pandas as pd
 
-from compare_nlu_results.dataframes import ResultDf, ResultSetDf, ResultSetDiffDf
+from compare_nlu_results import dataframes
 
 logger = logging.getLogger(__file__)
 
 
 class ResultTable:
+    # built once at import; every styled render reuses the same specs
+    _TABLE_STYLES = (
+        {
+            "selector": "th, td",
+            "props": [
+                ("border-style", "solid"),
+                ("border-width", "1px"),
+                ("border-color", "black"),
+                ("padding", "5px"),
+            ],
+        },
+        {"selector": "", "props": [("border-collapse", "collapse")]},
+        {"selector": "tr:hover", "props": [("background-color", "gainsboro")]},
+        {"selector": ".index_name", "props": [("color", "white")]},
+        {"selector": "th.row_heading", "props": [("text-align", "right")]},
+        {"selector": "th.col_heading", "props": [("text-align", "center")]},
+        {"selector": "td", "props": [("text-align", "center")]},
+    )
+
     def __init__(
         self,
-        df: ResultDf,
+        df: pd.DataFrame,
         metric_to_sort_by: Text,
         metrics_to_display: Optional[List[Text]] = None,
         labels: Optional[List[Text]] = None,
         title: Optional[Text] = "NLU Evaluation Results",
     ):
-        sorted_labels = df.get_sorted_labels(
-            metric_to_sort_by=metric_to_sort_by, labels=labels
+        sorted_labels = dataframes.get_sorted_labels(
+            df, metric_to_sort_by=metric_to_sort_by, labels=labels
         )
         if not metrics_to_display:
             metrics_to_display = df.columns
-        self.df = df.loc[sorted_labels, metrics_to_display]
-        self.df = df
+        self.df = df.reindex(index=sorted_labels, columns=metrics_to_display)
+        self._html_formatters = self._build_html_formatters()
+        self._html_cache: Dict[bool, Text] = {}
         self.title = title
 
-    def style_table(self) -> pd.DataFrame.style:
-        borders = {
-            "selector": "th, td",
-            "props": [
-                ("border-style", "solid"),
-                ("border-width", "1px"),
-                ("border-color", "black"),
-                ("padding", "5px"),
-            ],
-        }
-        border_collapse = {"selector": "", "props": [("border-collapse", "collapse")]}
-        row_hover = {
-            "selector": "tr:hover",
-            "props": [("background-color", "gainsboro")],
-        }
-        index_names = {"selector": ".index_name", "props": [("color", "white")]}
-        row_headers = {"selector": "th.row_heading", "props": [("text-align", "right")]}
-        column_headers = {
-            "selector": "th.col_heading",
-            "props": [("text-align", "center")],
+    def _build_html_formatters(self):
+        """Per-column value formatters, computed once per table.
+
+        Works for both flat string columns (substring test) and
+        MultiIndex tuple columns (membership test).
+        """
+        return {
+            col: ("{:.0f}".format if "support" in col else "{:.2f}".format)
+            for col in self.df.columns
+            if "confused_with" not in col
         }
-        value_cells = {"selector": "td", "props": [("text-align", "center")]}
-        styler = self.df.style.set_table_styles(
-            [
-                borders,
-                border_collapse,
-                row_hover,
-                index_names,
-                row_headers,
-                column_headers,
-                value_cells,
-            ]
-        )
 
-        styler.format(
-            na_rep="N/A",
-            formatter={
-                col: ("{:.0f}" if "support" in col else "{:.2f}")
-                for col in self.df.columns
-                if "confused_with" not in col
-            },
-        )
+    def style_table(self) -> pd.DataFrame.style:
+        styler = self.df.style.set_table_styles(list(self._TABLE_STYLES))
+        styler.format(na_rep="N/A", formatter=self._html_formatters)
         return styler
 
     def get_table(self, styled: bool = False) -> Text:
-        """Styled HTML table"""
-        if styled:
-            return self.style_table().render()
+        """HTML table, rendered once per variant and cached.
+
+        The table's dataframe is fixed in __init__, so repeated writes
+        of the same table reuse the rendered string.
+        """
+        table = self._html_cache.get(styled)
+        if table is None:
+            if styled:
+                table = self.style_table().to_html()
+            else:
+                buf = io.StringIO()
+                self.df.to_html(buf, na_rep="N/A", formatters=self._html_formatters)
+                table = buf.getvalue()
+            self._html_cache[styled] = table
+        return table
+
+    def _write_table(self, fh, styled: bool = False):
+        """Write the table into an open file handle.
+
+        Reuses the rendered string when get_table has already cached
+        one; otherwise streams straight into the handle so no
+        intermediate copy of the whole table is built in memory.
+        """
+        table = self._html_cache.get(styled)
+        if table is not None:
+            fh.write(table)
+        elif styled:
+            self.style_table().to_html(buf=fh)
         else:
-            return self.df.to_html(
-                na_rep="N/A",
-                formatters={
-                    col: ("{:.0f}".format if "support" in col else "{:.2f}".format)
-                    for col in self.df.columns
-                    if "confused_with" not in col
-                },
-            )
+            self.df.to_html(fh, na_rep="N/A", formatters=self._html_formatters)
 
     def write_to_file(
         self, html_outfile: Text, append_table: bool = False, style_table: bool = False
@@ -90,26 +103,27 @@ class ResultTable:
         mode = "w+"
         if append_table:
             mode = "a+"
-        with open(html_outfile, mode) as fh:
+        with open(html_outfile, mode, buffering=1 << 20) as fh:
             fh.write(f"<h1>{self.title}</h1>")
-            fh.write(self.get_table(styled=style_table))
+            self._write_table(fh, styled=style_table)
 
 
 class ResultSetTable(ResultTable):
     def __init__(
         self,
-        df: ResultSetDf,
+        df: pd.DataFrame,
         metric_to_sort_by: Text,
         metrics_to_display: Optional[List[Text]] = None,
         labels: Optional[List[Text]] = None,
     ):
-        sorted_labels = df.get_sorted_labels(
-            metric_to_sort_by=metric_to_sort_by, labels=labels
+        sorted_labels = dataframes.get_sorted_labels(
+            df, metric_to_sort_by=metric_to_sort_by, labels=labels
         )
         if not metrics_to_display:
-            metrics_to_display = df.columns.get_level_values(0)
-        self.df = df.loc[sorted_labels, metrics_to_display]
-        self.df = df
+            metrics_to_display = df.columns.unique(level=0)
+        self.df = df.reindex(index=sorted_labels, columns=metrics_to_display, level=0)
+        self._html_formatters = self._build_html_formatters()
+        self._html_cache: Dict[bool, Text] = {}
 
     def style_table(self):
         styler = super().style_table()
@@ -125,8 +139,8 @@ class ResultSetTable(ResultTable):
 class ResultSetDiffTable(ResultSetTable):
     def __init__(
         self,
-        result_set_df: ResultSetDf,
-        diff_df: ResultSetDiffDf,
+        result_set_df: pd.DataFrame,
+        diff_df: pd.DataFrame,
         metric_to_sort_by: Text,
         metrics_to_display: Optional[List[Text]] = None,
         display_only_diff: bool = False,
@@ -140,20 +154,16 @@ class ResultSetDiffTable(ResultSetTable):
 
         labels = None
         if self.display_only_diff:
-            labels = diff_df.find_labels_with_changes()
-        sorted_labels = result_set_df.get_sorted_labels(
-            metric_to_sort_by=metric_to_sort_by, labels=labels
+            labels = dataframes.find_labels_with_changes(diff_df)
+        sorted_labels = dataframes.get_sorted_labels(
+            result_set_df, metric_to_sort_by=metric_to_sort_by, labels=labels
         )
 
-        all_metrics = set(result_set_df.columns.get_level_values(0))
+        result_set_metrics = result_set_df.columns.get_level_values(0)
+        all_metrics = set(result_set_metrics)
         if not metrics_to_display:
-            metrics_order = {
-                metric: ix
-                for ix, metric in enumerate(result_set_df.columns.get_level_values(0))
-            }
-            metrics_to_display = sorted(
-                list(all_metrics), key=lambda x: metrics_order[x]
-            )
+            # dedupe while keeping the first-occurrence column order
+            metrics_to_display = list(dict.fromkeys(result_set_metrics))
         else:
             try:
                 assert all([metric in all_metrics for metric in metrics_to_display])
@@ -166,24 +176,37 @@ class ResultSetDiffTable(ResultSetTable):
                 raise
 
         self.metrics_to_display = metrics_to_display
-        self.df = pd.concat([result_set_df, diff_df], axis=1).loc[
-            sorted_labels, self.metrics_to_display
-        ]
+        self.df = pd.concat([result_set_df, diff_df], axis=1).reindex(
+            index=sorted_labels, columns=self.metrics_to_display, level=0
+        )
+        table_columns = set(self.df.columns)
         self.diff_columns = [
-            col for col in diff_df.columns.tolist() if col in self.df.columns
+            col for col in diff_df.columns.tolist() if col in table_columns
         ]
+        self._diff_classes = self._build_diff_classes()
+        self._html_formatters = self._build_html_formatters()
+        self._html_cache: Dict[bool, Text] = {}
+
+    def _build_diff_classes(self) -> pd.DataFrame:
+        """CSS class per cell ("neg"/"pos" on changed diff cells),
+        computed once so every styled render reuses it."""
+        classes = pd.DataFrame("", index=self.df.index, columns=self.df.columns)
+        diff_values = self.df[self.diff_columns].to_numpy()
+        classes.loc[:, self.diff_columns] = np.where(
+            diff_values < 0, "neg", np.where(diff_values > 0, "pos", "")
+        )
+        return classes
 
-    def style_table(self):
-        def style_negative(value):
-            return [("color", "red"), ("font-weight", "bold")] if value < 0 else None
-
-        def style_positive(value):
-            return [("color", "green"), ("font-weight", "bold")] if value > 0 else None
+    _DIFF_STYLES = (
+        {"selector": "td.neg", "props": [("color", "red"), ("font-weight", "bold")]},
+        {"selector": "td.pos", "props": [("color", "green"), ("font-weight", "bold")]},
+    )
 
+    def style_table(self):
         styler = super().style_table()
 
-        styler.applymap(style_negative, subset=self.diff_columns)
-        styler.applymap(style_positive, subset=self.diff_columns)
+        styler.set_table_styles(list(self._DIFF_STYLES), overwrite=False)
+        styler.set_td_classes(self._diff_classes)
 
         return styler
 
@@ -193,7 +216,7 @@ class ResultSetDiffTable(ResultSetTable):
         mode = "w+"
         if append_table:
             mode = "a+"
-        with open(html_outfile, mode) as fh:
+        with open(html_outfile, mode, buffering=1 << 20) as fh:
             fh.write(f"<h1>{self.title}</h1>")
             if self.display_only_diff:
                 fh.write(
@@ -201,4 +224,4 @@ class ResultSetDiffTable(ResultSetTable):
                     f"differences in at least one of the following metrics: "
                     f"{self.metrics_to_diff} are displayed.</body>"
                 )
-            fh.write(self.get_table(styled=style_table))
+            self._write_table(fh, styled=style_table)